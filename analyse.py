@@ -1,57 +1,47 @@
 #!/bin/python3
+import numpy as np
 import pandas as pd
 
-def stats(df: pd.DataFrame, time_frame: int, t_col: str = "timestamp", v_col: str = "latency") -> pd.DataFrame:
+def stats(t: np.ndarray, v: np.ndarray, time_frame: int) -> pd.DataFrame:
     """Compute basic statistics for latency and packet loss.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        DataFrame containing the data.
+    t : np.ndarray
+        Timestamps in seconds.
+    v : np.ndarray
+        Values to compute statistics on (e.g., latency), aligned with `t`.
     time_frame : int
         Time frame in seconds to compute statistics over.
-    t_col : str
-        Name of the timestamp column.
-    v_col : str
-        Name of the column to compute statistics on (e.g., latency).
 
     Returns
     -------
     pd.DataFrame
         DataFrame containing the computed statistics.
     """
-    df = df.sort_values(t_col).reset_index(drop=True)
-    start_time = df[t_col].min()
-    end_time = df[t_col].max()
-    bins = pd.interval_range(start=start_time, end=end_time + time_frame, freq=time_frame, closed='left')
-    df['time_bin'] = pd.cut(df[t_col], bins)
+    order = np.argsort(t, kind='stable')
+    t = t[order]
+    start_time = t[0]
+    bin_idx = ((t - start_time) // time_frame).astype(np.int64)
 
-    stats_list = []
-    for interval in bins:
-        bin_data = df[df['time_bin'] == interval]
-        if not bin_data.empty:
-            stats_list.append({
-                'time_bin_start': interval.left,
-                'time_bin_end': interval.right,
-                'mean': round(bin_data[v_col].mean(), 2),
-                'median': round(bin_data[v_col].median(), 2),
-                'min': bin_data[v_col].min(),
-                'max': bin_data[v_col].max(),
-                'std': round(bin_data[v_col].std(), 2),
-                'count': bin_data[v_col].count()
-            })
-
-    stats_df = pd.DataFrame(stats_list)
+    # bin_idx is already non-decreasing, groups come out in order without sorting
+    stats_df = pd.Series(v[order]).groupby(bin_idx, sort=False).agg(
+        mean='mean', median='median', min='min', max='max', std='std', count='count')
+    stats_df[['mean', 'median', 'std']] = stats_df[['mean', 'median', 'std']].round(2)
+    time_bin_start = start_time + stats_df.index.to_numpy() * time_frame
+    stats_df.insert(0, 'time_bin_start', time_bin_start)
+    stats_df.insert(1, 'time_bin_end', time_bin_start + time_frame)
+    stats_df = stats_df.reset_index(drop=True)
     return stats_df
 
 if __name__ == "__main__":
-    df = pd.read_csv("merged_latency.csv")
-    stats_df = stats(df, time_frame=10, t_col='timestamp', v_col='latency')
+    df = pd.read_csv("merged_latency.csv", engine="pyarrow")
+    stats_df = stats(df['timestamp'].to_numpy(), df['latency'].to_numpy(), time_frame=10)
     print(stats_df)
     stats_df.to_csv("stats_latency.csv", index=False)
 
-    df = pd.read_csv("merged_bw.csv")
-    loss = (df['lost'] / df['total']) * 100
-    stats_df = stats(df.assign(loss=loss), time_frame=10, t_col='timestamp', v_col='loss')
+    df = pd.read_csv("merged_bw.csv", engine="pyarrow")
+    loss = (df['lost'].to_numpy() / df['total'].to_numpy()) * 100
+    stats_df = stats(df['timestamp'].to_numpy(), loss, time_frame=10)
     print(stats_df)
     stats_df.to_csv("stats_loss.csv", index=False)
\ No newline at end of file
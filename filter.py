@@ -1,15 +1,16 @@
 #!/bin/python3
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from collections.abc import Callable
 
 DIR = Path("/media/marcel/TOSHIBA EXT/rosbags")
 
-_ = lambda x: x
-ns_to_s = lambda x: round(x * 1e-9) if isinstance(x, (int, float)) else x
-round1 = lambda x: round(x, 1) if isinstance(x, float) else x
-round3 = lambda x: round(x, 3) if isinstance(x, float) else x
-round6 = lambda x: round(x, 6) if isinstance(x, float) else x
+_ = lambda s: s
+ns_to_s = lambda s: (s + 500_000_000) // 1_000_000_000
+round1 = lambda s: s.round(1)
+round3 = lambda s: s.round(3)
+round6 = lambda s: s.round(6)
 
 filters = {
     "bandwidth/fix": {"timestamp": ns_to_s, "latitude": round6, "longitude": round6},
@@ -20,27 +21,23 @@ filters = {
 
 def fuse_on_timestamp(df: pd.DataFrame, time_col: str = "timestamp") -> pd.DataFrame:
     """Only keep the first entry for each timestamp."""
-    def fuse_group(group: pd.DataFrame, include_group: bool = True) -> pd.DataFrame:
-        if include_group:
-            return group.iloc[[0]]
-        else:
-            return group.iloc[0:1]
+    return df.drop_duplicates(subset=[time_col], keep='first').reset_index(drop=True)
 
-    return df.groupby(time_col).apply(fuse_group).reset_index(drop=True)
-
-def filter_csv(path: Path, filter: dict[str, Callable]):
-    df = pd.read_csv(path)
+def filter_csv(path: Path, filter: dict[str, Callable[[pd.Series], pd.Series]]):
+    df = pd.read_csv(path, engine="pyarrow", usecols=list(filter.keys()))
     df = df[list(filter.keys())]
     for col, func in filter.items():
-        df[col] = df[col].apply(func)
+        df[col] = func(df[col])
     filtered = fuse_on_timestamp(df)
-    # Filter zero values for lat/lon
+    # Filter zero and missing values for lat/lon
     if 'latitude' in filtered.columns and 'longitude' in filtered.columns:
-        filtered = filtered[(filtered['latitude'] != 0) & (filtered['longitude'] != 0)]
-        filtered = filtered.dropna(subset=['latitude', 'longitude'])
+        lat = filtered['latitude'].to_numpy(dtype=float)
+        lon = filtered['longitude'].to_numpy(dtype=float)
+        mask = (lat != 0) & (lon != 0) & ~np.isnan(lat) & ~np.isnan(lon)
+        filtered = filtered.loc[mask]
     df = filtered.sort_values("timestamp").reset_index(drop=True)
-    path_out = path.parent / f"filtered_{path.name}"
-    df.to_csv(path_out, index=False)
+    path_out = path.parent / f"filtered_{path.stem}.pq"
+    df.to_parquet(path_out, engine="pyarrow", compression="zstd", index=False)
 
 if __name__ == "__main__":
     for key in filters.keys():
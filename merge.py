@@ -1,4 +1,5 @@
 #!/bin/bash
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -6,34 +7,50 @@ DIR = Path("/media/marcel/TOSHIBA EXT/rosbags")
 OUT_DIR = Path("./data")
 
 def merge_on_positions(df1: pd.DataFrame, df2: pd.DataFrame, lat_col: str = "latitude", lon_col: str = "longitude", tolerance: float = 0.0001) -> pd.DataFrame:
-    df1['key'] = 1
-    df2['key'] = 1
-    merged_df = pd.merge(df1, df2, on='key').drop('key', axis=1)
-    condition = (abs(merged_df[lat_col + '_x'] - merged_df[lat_col + '_y']) <= tolerance) & \
-                (abs(merged_df[lon_col + '_x'] - merged_df[lon_col + '_y']) <= tolerance)
-    merged_df = merged_df[condition].dropna()
+    df1 = df1.dropna(subset=[lat_col, lon_col]).reset_index(drop=True)
+    df2 = df2.dropna(subset=[lat_col, lon_col]).reset_index(drop=True)
+    # Candidate pairs: df2 rows whose latitude falls in each df1 row's latitude band
+    lat1, lon1 = df1[lat_col].to_numpy(), df1[lon_col].to_numpy()
+    lat2, lon2 = df2[lat_col].to_numpy(), df2[lon_col].to_numpy()
+    order = np.argsort(lat2, kind='stable')
+    band = tolerance * (1 + 1e-6)  # slightly wider, the exact check is done below
+    lo = np.searchsorted(lat2[order], lat1 - band, side='left')
+    hi = np.searchsorted(lat2[order], lat1 + band, side='right')
+    counts = hi - lo
+    idx1 = np.repeat(np.arange(len(df1)), counts)
+    idx2 = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - lo, counts)]
+    dlat = lat1[idx1] - lat2[idx2]
+    dlon = lon1[idx1] - lon2[idx2]
+    condition = dlat * dlat + dlon * dlon <= tolerance * tolerance
+    idx1, idx2 = idx1[condition], idx2[condition]
+    # Keep the row order of a df1 x df2 cross join
+    pair_order = np.lexsort((idx2, idx1))
+    idx1, idx2 = idx1[pair_order], idx2[pair_order]
+    merged_df = df1.iloc[idx1].reset_index(drop=True).join(df2.iloc[idx2].reset_index(drop=True), lsuffix='_x', rsuffix='_y')
+    merged_df = merged_df.dropna()
     merged_df.drop(columns=[lat_col + '_y', lon_col + '_y'], inplace=True)
     merged_df.rename(columns={lat_col + '_x': lat_col, lon_col + '_x': lon_col}, inplace=True)
     return merged_df
 
 if __name__ == "__main__":
-    bw_fix = pd.read_csv(DIR / "bandwidth/filtered_fix.csv")
-    bw_uplink = pd.read_csv(DIR / "bandwidth/filtered_uplink.csv")
+    bw_fix = pd.read_parquet(DIR / "bandwidth/filtered_fix.pq")
+    bw_uplink = pd.read_parquet(DIR / "bandwidth/filtered_uplink.pq")
 
-    vehicle_fix = pd.read_csv(DIR / "vehicle/filtered_fix.csv")
-    vehicle_net = pd.read_csv(DIR / "vehicle/filtered_network_metrics.csv")
+    vehicle_fix = pd.read_parquet(DIR / "vehicle/filtered_fix.pq")
+    vehicle_net = pd.read_parquet(DIR / "vehicle/filtered_network_metrics.pq")
+    # filter.py already sorts every table by timestamp, as merge_asof requires
 
     # Bandwidth merging with its own fix data
-    merged_bw = pd.merge_asof(bw_uplink.sort_values("timestamp"),
-                            bw_fix.sort_values("timestamp"),
+    merged_bw = pd.merge_asof(bw_uplink,
+                            bw_fix,
                             on="timestamp",
                             direction="nearest",
                             tolerance=1)  # 1 second tolerance
     merged_bw.to_csv(OUT_DIR / "merged_bw.csv", index=False)
 
     # Latency merging with vehicle fix data
-    merged_latency = pd.merge_asof(vehicle_net.sort_values("timestamp"),
-                                vehicle_fix.sort_values("timestamp"),
+    merged_latency = pd.merge_asof(vehicle_net,
+                                vehicle_fix,
                                 on="timestamp",
                                 direction="nearest",
                                 tolerance=1)  # 1 second tolerance
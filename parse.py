@@ -8,6 +8,8 @@ import numpy as np
 import yaml
 from pathlib import Path
 import csv
+from multiprocessing import Pool
+import operator
 
 DIR = Path("/media/marcel/TOSHIBA EXT/rosbags")
 BAGS = [p for p in DIR.iterdir() if p.is_dir() and not p.name.startswith(".")]
@@ -18,11 +20,15 @@ DIAGNOSTICS = "diagnostic_msgs/msg/DiagnosticArray"
 NETWORK_METRICS = "tod_network_monitoring_msgs/msg/NetworkMetrics"
 IMAGE = "sensor_msgs/msg/Image"
 TARGET_FPS = 40
+FLUSH_N = 10000  # rows buffered per CSV topic before writing
 
 class DummyHandler:
     def handle_msg(self, msg, t_ns: int):
         pass
 
+    def close(self):
+        pass
+
 class TopicHandlerCsv(DummyHandler):
 
     def __init__(self, path: Path, topic_name: str, columns: list[str]) -> None:
@@ -30,17 +36,30 @@ class TopicHandlerCsv(DummyHandler):
         self.writer = csv.writer(self.out_csv)
         self.writer.writerow(columns)
         self.columns = columns
+        self.buf = []
+        # Every message of a topic has the same fields, only the timestamp comes from the bag
+        self.fields = [col for col in columns if col != 'timestamp']
+        self.timestamp_idx = columns.index('timestamp')
+        self.get_fields = operator.attrgetter(*self.fields) if self.fields else lambda msg: ()
 
     def handle_msg(self, msg, t_ns: int):
-        data = {}
-        for field in self.columns:
-            if field == 'timestamp':
-                data['timestamp'] = t_ns
-            elif hasattr(msg, field):
-                data[field] = getattr(msg, field)
-            else:
-                data[field] = ""
-        self.writer.writerow([data.get(col, "") for col in self.columns])
+        values = self.get_fields(msg)
+        row = [values] if len(self.fields) == 1 else list(values)
+        row.insert(self.timestamp_idx, t_ns)
+        self.write_row(row)
+
+    def write_row(self, row):
+        self.buf.append(row)
+        if len(self.buf) >= FLUSH_N:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.buf)
+        self.buf.clear()
+
+    def close(self):
+        self.flush()
+        self.out_csv.close()
 
     @staticmethod
     def handler_from_msg(path: Path, topic_name: str, msg) -> 'TopicHandlerCsv':
@@ -61,7 +80,7 @@ class DiagnosticArrayHandler(TopicHandlerCsv):
             for kv in status.values:
                 kv_dict[kv.key] = kv.value
         # Ensure all columns are present in the output
-        self.writer.writerow([kv_dict.get(col, "") for col in self.columns])
+        self.write_row([kv_dict.get(col, "") for col in self.columns])
 
     @staticmethod
     def handler_from_msg(path: Path, topic_name: str, msg) -> 'DiagnosticArrayHandler':
@@ -103,23 +122,25 @@ class ImageTopicHandler(DummyHandler):
 
     def emit_frozen_frames_until(self, t_img_ns: int) -> int:
         """Emit repeat frames only if there is a gap between last and current image."""
-        emitted = 0
-        while (
-            self.next_target_ts_ns is not None
-            and self.next_target_ts_ns < t_img_ns
-            and self.last_frame_bgr is not None
-        ):
-            self.init_writer_if_needed(self.last_frame_bgr)
+        if self.next_target_ts_ns is None or self.last_frame_bgr is None:
+            return 0
+        # Number of target ticks before the current image
+        n = (t_img_ns - self.next_target_ts_ns + self.period_ns - 1) // self.period_ns
+        if n <= 0:
+            return 0
+        self.init_writer_if_needed(self.last_frame_bgr)
+        for _ in range(n):
             self.writer.write(self.last_frame_bgr)
-            self.csv_w.writerow([self.frame_idx, self.next_target_ts_ns - self.video_start_ts, self.last_source_ts_ns, 1])  # is_repeat=1
-            self.frame_idx += 1
-            emitted += 1
-            self.next_target_ts_ns += self.period_ns
-        return emitted
+        target_ts = self.next_target_ts_ns - self.video_start_ts
+        self.csv_w.writerows([self.frame_idx + k, target_ts + k * self.period_ns, self.last_source_ts_ns, 1]  # is_repeat=1
+                             for k in range(n))
+        self.frame_idx += n
+        self.next_target_ts_ns += n * self.period_ns
+        return n
 
     def handle_msg(self, msg, t_ns: int):
-        img_rgb = self.bridge.imgmsg_to_cv2(msg, desired_encoding="passthrough")
-        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+        # cv_bridge returns bgr8 images as is and only converts other encodings
+        img_bgr = self.bridge.imgmsg_to_cv2(msg, desired_encoding="bgr8")
 
         if not self.first_img_seen:
             self.video_start_ts = t_ns
@@ -164,13 +185,13 @@ def process_bag(path):
 
     reader = rosbag2_py.SequentialReader()
     reader.open(storage_options, converter_options)
+    msg_types = {tt.name: get_message(tt.type) for tt in reader.get_all_topics_and_types()}
 
     handlers = {}
 
     while reader.has_next():
         (topic, data, t) = reader.read_next()
-        msg_type = get_message(next(tt for tt in reader.get_all_topics_and_types() if tt.name == topic).type)
-        msg = deserialize_message(data, msg_type)
+        msg = deserialize_message(data, msg_types[topic])
         
         if topics[topic] == IMAGE and not PROCESS_IMAGES:
             continue
@@ -186,12 +207,12 @@ def process_bag(path):
         handlers[topic].handle_msg(msg, t)
 
     for handler in handlers.values():
-        if isinstance(handler, ImageTopicHandler):
-            handler.close()
+        handler.close()
     
     print(f"Finished processing bag at {path}")
 
 if __name__ == "__main__":
-    for bag_path in BAGS:
-        process_bag(bag_path)
+    # Bags are independent, process them in parallel
+    with Pool() as pool:
+        pool.map(process_bag, BAGS)
     print("All done.")
\ No newline at end of file
@@ -1,6 +1,6 @@
 #!/bin/python3
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib.figure import Figure
 from pathlib import Path
@@ -19,7 +19,8 @@ def plot_network_metrics(t: pd.Series|dict[str,pd.Series], latency: pd.Series, l
         Latency values in milliseconds.
     loss : pd.Series
         Packet loss values as a proportion (0 to 1)."""
-    fig, ax1 = plt.subplots(figsize=(12, 4))
+    fig = Figure(figsize=(12, 4))
+    ax1 = fig.subplots()
 
     s = 3
     color = 'tab:blue'
@@ -42,8 +43,7 @@ def plot_network_metrics(t: pd.Series|dict[str,pd.Series], latency: pd.Series, l
     ax2.set_ylim(0, 55)
     ax2.tick_params(axis='y', labelcolor=color)
 
-    fig.tight_layout()  
-    # plt.show(block=False)
+    fig.tight_layout()
     return fig
 
 def plot_bandwidth(t: pd.Series, bw: pd.Series, tx_bitrate: pd.Series):
@@ -59,21 +59,21 @@ def plot_bandwidth(t: pd.Series, bw: pd.Series, tx_bitrate: pd.Series):
         Transmit bitrate values in Mbps.
     rx_bitrate : pd.Series
         Receive bitrate values in Mbps."""
-    fig = plt.figure(figsize=(12, 4))
+    fig = Figure(figsize=(12, 4))
+    ax = fig.subplots()
 
     s = 3
     color = 'tab:red'
-    plt.scatter(t, bw, color=color, s=s, label='Estimated bandwidth (Mbps)')
-    plt.plot(t, tx_bitrate, color='tab:orange', label='Transmit bitrate (Mbps)', linewidth=0.5)
-    plt.xlabel('Time (s)')
-    plt.ylabel('Estimated bandwidth (Mbps)', color=color)
-    plt.tick_params(axis='y', labelcolor=color)
-    plt.legend(loc='lower right')
-    plt.ylim(-1, 55)
-    plt.grid(True)
-
-    fig.tight_layout()  
-    # plt.show(block=False)
+    ax.scatter(t, bw, color=color, s=s, label='Estimated bandwidth (Mbps)')
+    ax.plot(t, tx_bitrate, color='tab:orange', label='Transmit bitrate (Mbps)', linewidth=0.5)
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Estimated bandwidth (Mbps)', color=color)
+    ax.tick_params(axis='y', labelcolor=color)
+    ax.legend(loc='lower right')
+    ax.set_ylim(-1, 55)
+    ax.grid(True)
+
+    fig.tight_layout()
     return fig
 
 def plot_latency_distribution(latency: pd.Series):
@@ -83,19 +83,19 @@ def plot_latency_distribution(latency: pd.Series):
     ----------
     latency : pd.Series
         Latency values in milliseconds."""
-    fig = plt.figure(figsize=(8, 4))
-    plt.hist(latency, bins=100, color='tab:blue', alpha=0.7)
-    plt.xlabel('Latency (ms)')
-    plt.ylabel('Frequency')
-    plt.title('Latency Distribution')
-    plt.grid(True)
-    plt.tight_layout()
-    #plt.show()
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.hist(latency, bins=100, color='tab:blue', alpha=0.7)
+    ax.set_xlabel('Latency (ms)')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Latency Distribution')
+    ax.grid(True)
+    fig.tight_layout()
 
     return fig
 
 def plot_gps(lat: pd.Series, lon: pd.Series, z: pd.Series,
-             label: str, cmap: mcolors.Colormap) -> Figure:
+             label: str, cmap: mcolors.Colormap, fig: Figure | None = None) -> Figure:
     """Plot GPS trajectory.
 
     Parameters
@@ -103,20 +103,41 @@ def plot_gps(lat: pd.Series, lon: pd.Series, z: pd.Series,
     lat : pd.Series
         Latitude values.
     lon : pd.Series
-        Longitude values."""
-    fig = plt.figure()
-    plt.scatter(lon, lat, c=z, cmap=cmap, s=1)
-    cbar = plt.colorbar()
+        Longitude values.
+    fig : Figure, optional
+        Figure to clear and draw into, a new one is created if None."""
+    if fig is None:
+        fig = Figure()
+    else:
+        fig.clear()
+    ax = fig.subplots()
+    sc = ax.scatter(lon, lat, c=z, cmap=cmap, s=1)
+    cbar = fig.colorbar(sc, ax=ax)
     cbar.set_label(label)
-    plt.xlabel('Longitude')
-    plt.ylabel('Latitude')
-    plt.axis('equal')
-    plt.grid(True)
-    plt.tight_layout()
-    #plt.show()
+    ax.set_xlabel('Longitude')
+    ax.set_ylabel('Latitude')
+    ax.axis('equal')
+    ax.grid(True)
+    fig.tight_layout()
 
     return fig
 
+def _drop_short_freezes(is_freezed: np.ndarray, threshold: int) -> np.ndarray:
+    """Clear freeze flags that are not part of a block of `threshold` consecutive freezes.
+
+    Each run of freezes is split into blocks of `threshold` frames from its start and
+    the incomplete tail block is cleared. The last `threshold` frames are left as is."""
+    frozen = is_freezed.astype(bool)
+    starts = np.flatnonzero(frozen & ~np.r_[False, frozen[:-1]])
+    ends = np.flatnonzero(frozen & ~np.r_[frozen[1:], False]) + 1
+    lengths = ends - starts
+    pos_in_run = np.flatnonzero(frozen) - np.repeat(starts, lengths)
+    keep = frozen.copy()
+    keep[frozen] = pos_in_run < np.repeat(lengths // threshold * threshold, lengths)
+    tail = max(len(frozen) - threshold, 0)
+    keep[tail:] = frozen[tail:]
+    return keep.astype(int)
+
 def plot_frame_drops(t, is_freezed, threshold: int = 2):
     """Plot frame freeze events over time.
 
@@ -128,14 +149,9 @@ def plot_frame_drops(t, is_freezed, threshold: int = 2):
         Binary series indicating if the frame is freezed (1) or not (0).
     threshold : float, optional
         Threshold in consecutive frames to consider a frame as freezed, by default 2."""
-    fig, ax1 = plt.subplots(figsize=(12, 4))
-    i = 0
-    while i < len(is_freezed) - threshold:
-        if all(is_freezed[i:i+threshold]):
-            i += threshold
-        else:
-            is_freezed[i] = 0
-            i += 1
+    fig = Figure(figsize=(12, 4))
+    ax1 = fig.subplots()
+    is_freezed = pd.Series(_drop_short_freezes(is_freezed.to_numpy(), threshold), index=is_freezed.index)
 
     color = 'tab:blue'
     ax1.set_xlabel('Time (s)')
@@ -155,15 +171,14 @@ def plot_frame_drops(t, is_freezed, threshold: int = 2):
     ax2.tick_params(axis='y', labelcolor=color)
 
     fig.tight_layout()
-    #plt.show()
 
     return fig
 
 
 if __name__ == "__main__":
-    bw_df = pd.read_csv(DIR / "merged_bw.csv")
-    latency_df = pd.read_csv(DIR / "merged_latency.csv")
-    merged_df = pd.read_csv(DIR / "merged_data.csv")
+    bw_df = pd.read_csv(DIR / "merged_bw.csv", engine="pyarrow")
+    latency_df = pd.read_csv(DIR / "merged_latency.csv", engine="pyarrow")
+    merged_df = pd.read_csv(DIR / "merged_data.csv", engine="pyarrow")
 
     # Loss and bandwidth maps
     lat = bw_df['latitude']
@@ -184,7 +199,9 @@ if __name__ == "__main__":
     }
     cmap = mcolors.LinearSegmentedColormap('RedGreen', cdict)
 
-    fig = plot_gps(lat, lon, loss, label="Packet loss (%)", cmap=cmap)
+    # All maps are drawn into the same figure, each plot_gps call clears it
+    map_fig = Figure()
+    fig = plot_gps(lat, lon, loss, label="Packet loss (%)", cmap=cmap, fig=map_fig)
     fig.savefig(OUT_DIR / "loss_map.pdf", format='pdf', dpi=300)
 
     cdict2 = {
@@ -200,7 +217,7 @@ if __name__ == "__main__":
                   (1.0, 0, 0))
     }
     cmap2 = mcolors.LinearSegmentedColormap('GreenRed', cdict2)
-    fig = plot_gps(lat, lon, bw, label="Estimated bandwidth (Mbps)", cmap=cmap2)
+    fig = plot_gps(lat, lon, bw, label="Estimated bandwidth (Mbps)", cmap=cmap2, fig=map_fig)
     fig.savefig(OUT_DIR / "bandwidth_map.pdf", format='pdf', dpi=300)
 
     # Latency map
@@ -208,47 +225,45 @@ if __name__ == "__main__":
     lon = latency_df['longitude']
     latency = latency_df['latency']
 
-    fig = plot_gps(lat, lon, latency, label="Latency (ms)", cmap=cmap)
+    fig = plot_gps(lat, lon, latency, label="Latency (ms)", cmap=cmap, fig=map_fig)
     fig.savefig(OUT_DIR / "latency_map.pdf", format='pdf', dpi=300)
 
     # Merged loss and latency maps
     lat = merged_df['latitude']
     lon = merged_df['longitude']
     z1 = merged_df['latency']
-    z2 = merged_df['lost'] / merged_df['total'] * 100
-    z3 = 50 * (1 - z2/100) # convert to bandwidth in Mbps
+    merged_loss = merged_df['lost'] / merged_df['total']
+    z2 = merged_loss * 100
+    z3 = 50 * (1 - merged_loss) # convert to bandwidth in Mbps
 
-    fig = plot_gps(lat, lon, z1, label="Latency (ms)", cmap=cmap)
+    fig = plot_gps(lat, lon, z1, label="Latency (ms)", cmap=cmap, fig=map_fig)
     fig.savefig(OUT_DIR / "merged_latency_map.pdf", format='pdf', dpi=300)
-    fig = plot_gps(lat, lon, z2, label="Packet loss (%)", cmap=cmap)
+    fig = plot_gps(lat, lon, z2, label="Packet loss (%)", cmap=cmap, fig=map_fig)
     fig.savefig(OUT_DIR / "merged_loss_map.pdf", format='pdf', dpi=300)
-    fig = plot_gps(lat, lon, z3, label="Estimated bandwidth (Mbps)", cmap=cmap2)
+    fig = plot_gps(lat, lon, z3, label="Estimated bandwidth (Mbps)", cmap=cmap2, fig=map_fig)
     fig.savefig(OUT_DIR / "merged_bandwidth_map.pdf", format='pdf', dpi=300)
 
     # Network metrics over time
+    merged_t = merged_df['timestamp'] - merged_df['timestamp'].min()
     t = {'latency': latency_df['timestamp'] - latency_df['timestamp'].min(),
-         'loss': merged_df['timestamp'] - merged_df['timestamp'].min()}
-    latency = latency_df['latency']
-    loss = merged_df['lost'] / merged_df['total']
+         'loss': merged_t}
 
-    fig = plot_network_metrics(t, latency, loss)
+    fig = plot_network_metrics(t, latency, merged_loss)
     fig.savefig(OUT_DIR / "network_metrics_time.pdf", format='pdf', dpi=300)
 
     # Bandwidth over time
-    t = merged_df['timestamp'] - merged_df['timestamp'].min()
-    bw = 50 * (1 - (merged_df['lost'] / merged_df['total'])) # convert to bandwidth in Mbps
     tx_bitrate = merged_df['tx_bitrate_mbps']
 
-    fig = plot_bandwidth(t, bw, tx_bitrate)
+    fig = plot_bandwidth(merged_t, z3, tx_bitrate)
     fig.savefig(OUT_DIR / "bandwidth_time.pdf", format='pdf', dpi=300)
 
     # Latency distribution
-    latency = latency_df['latency']
     fig = plot_latency_distribution(latency)
     fig.savefig(OUT_DIR / "latency_distribution.pdf", format='pdf', dpi=300)
 
     # Frame drops
-    sidecar = pd.read_csv(DIR / "operator_sidecar.csv")
+    sidecar = pd.read_csv(DIR / "operator_sidecar.csv", engine="pyarrow",
+                          usecols=["video_timestamp_ns", "is_repeat"])
     t = sidecar['video_timestamp_ns'] * 1e-9
     is_freezed = sidecar['is_repeat']
     fig = plot_frame_drops(t, is_freezed, threshold=2)